@@ -1,10 +1,15 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, render_template, request, jsonify, Response
+import io
 import json
 import os
-import time
 from functools import lru_cache
 from datetime import datetime, timedelta
 
+from models.history_io import HistoryImporter, iter_records, export_records, normalize_date
+from models.rollups import Rollups, GRANULARITIES
+from models.storage import source_version, save_habits
+from models.insights_cache import InsightsCache
+
 
 app = Flask(__name__)
 
@@ -16,10 +21,9 @@ if not os.path.exists('data/habits.json') or os.path.getsize('data/habits.json')
     with open('data/habits.json', 'w') as f:
         json.dump({"habits": []}, f, indent=2)
 
-# AI insights cache - defined only once
-_insights_cache = {}
-_insights_cache_time = 0
-_CACHE_DURATION = 300  # 5 minutes in seconds
+# AI insights cache - stored in SQLite so every worker process shares it.
+# Entries are keyed by a hash of habits.json, so writes invalidate them implicitly
+_insights_cache = InsightsCache('data/insights_cache.db', duration=300)
 
 @app.route('/')
 def index():
@@ -30,6 +34,11 @@ def get_habits():
     try:
         with open('data/habits.json', 'r') as f:
             data = json.load(f)
+        
+        # Attach server-computed stats so the frontend doesn't recompute them
+        for habit in data.get('habits', []):
+            habit['stats'] = habit_stats(habit)
+        
         return jsonify(data)
     except (FileNotFoundError, json.JSONDecodeError):
         # If file doesn't exist or is empty/invalid, return empty habits list
@@ -43,30 +52,29 @@ def add_habit():
     new_habit['completions'] = []
     
     try:
-        with open('data/habits.json', 'r') as f:
-            try:
-                data = json.load(f)
-            except json.JSONDecodeError:
-                # If file exists but contains invalid JSON
-                data = {"habits": []}
+        with open('data/habits.json', 'rb') as f:
+            raw = f.read()
+        try:
+            data = json.loads(raw)
+        except json.JSONDecodeError:
+            # If file exists but contains invalid JSON
+            data = {"habits": []}
     except FileNotFoundError:
         # If file doesn't exist
+        raw = b''
         data = {"habits": []}
     
     if "habits" not in data:
         data["habits"] = []
     
-    data['habits'].append(new_habit)
+    # Rollups must describe exactly the contents read above
+    rollups = Rollups.load(source_version(raw), data['habits'])
     
-    with open('data/habits.json', 'w') as f:
-        json.dump(data, f, indent=2)
+    data['habits'].append(new_habit)
     
-    # Clear the insights cache when habits change
-    global _insights_cache, _insights_cache_time
-    _insights_cache = {}
-    _insights_cache_time = None
+    rollups.save(version=save_habits(data))
     
-    return jsonify(new_habit)
+    return jsonify({**new_habit, "stats": habit_stats(new_habit)})
 
 @app.route('/api/habits/<habit_id>/toggle', methods=['POST'])
 def toggle_habit(habit_id):
@@ -75,9 +83,18 @@ def toggle_habit(habit_id):
     if not date_str:
         return jsonify({"error": "Date is required"}), 400
     
+    # Reject bad dates before they reach the file and break stats for the habit
+    date_str = normalize_date(date_str)
+    if date_str is None:
+        return jsonify({"error": "Date must be in YYYY-MM-DD format"}), 400
+    
     try:
-        with open('data/habits.json', 'r') as f:
-            data = json.load(f)
+        with open('data/habits.json', 'rb') as f:
+            raw = f.read()
+        data = json.loads(raw)
+        
+        # Rollups must describe exactly the contents read above
+        rollups = Rollups.load(source_version(raw), data.get('habits', []))
         
         habit_found = False
         completion_toggled = False
@@ -108,18 +125,20 @@ def toggle_habit(habit_id):
             return jsonify({"error": "Habit not found"}), 404
         
         # Save updates back to file
-        with open('data/habits.json', 'w') as f:
-            json.dump(data, f, indent=2)
+        version = save_habits(data)
         
-        # Clear the insights cache when habits change
-        global _insights_cache, _insights_cache_time
-        _insights_cache = {}
-        _insights_cache_time = None
+        # Only count a removal once no completion remains for that date
+        if completion_toggled:
+            rollups.apply(habit_id, date_str, 1)
+        elif not any(c.get('date') == date_str for c in habit['completions']):
+            rollups.apply(habit_id, date_str, -1)
+        rollups.save(version=version)
         
         return jsonify({
             "habit_id": habit_id,
             "date": date_str,
-            "completed": completion_toggled
+            "completed": completion_toggled,
+            "stats": habit_stats(habit)
         })
     
     except (FileNotFoundError, json.JSONDecodeError) as e:
@@ -129,8 +148,12 @@ def toggle_habit(habit_id):
 def update_habit(habit_id):
     updated_data = request.json
     try:
-        with open('data/habits.json', 'r') as f:
-            data = json.load(f)
+        with open('data/habits.json', 'rb') as f:
+            raw = f.read()
+        data = json.loads(raw)
+        
+        # Rollups must describe exactly the contents read above
+        rollups = Rollups.load(source_version(raw), data.get('habits', []))
         
         habit_found = False
         for habit in data.get('habits', []):
@@ -145,13 +168,7 @@ def update_habit(habit_id):
             return jsonify({"error": "Habit not found"}), 404
         
         # Save updates back to file
-        with open('data/habits.json', 'w') as f:
-            json.dump(data, f, indent=2)
-        
-        # Clear the insights cache when habits change
-        global _insights_cache, _insights_cache_time
-        _insights_cache = {}
-        _insights_cache_time = None
+        rollups.save(version=save_habits(data))
         
         return jsonify({"message": "Habit updated successfully", "habit_id": habit_id})
     except (FileNotFoundError, json.JSONDecodeError) as e:
@@ -160,8 +177,12 @@ def update_habit(habit_id):
 @app.route('/api/habits/<habit_id>', methods=['DELETE'])
 def delete_habit(habit_id):
     try:
-        with open('data/habits.json', 'r') as f:
-            data = json.load(f)
+        with open('data/habits.json', 'rb') as f:
+            raw = f.read()
+        data = json.loads(raw)
+        
+        # Rollups must describe exactly the contents read above
+        rollups = Rollups.load(source_version(raw), data.get('habits', []))
         
         initial_count = len(data.get('habits', []))
         data['habits'] = [h for h in data.get('habits', []) if h['id'] != habit_id]
@@ -170,18 +191,86 @@ def delete_habit(habit_id):
             return jsonify({"error": "Habit not found"}), 404
         
         # Save updates back to file
-        with open('data/habits.json', 'w') as f:
-            json.dump(data, f, indent=2)
+        version = save_habits(data)
         
-        # Clear the insights cache when habits change
-        global _insights_cache, _insights_cache_time
-        _insights_cache = {}
-        _insights_cache_time = None
+        rollups.remove_habit(habit_id)
+        rollups.save(version=version)
         
         return jsonify({"message": "Habit deleted successfully", "habit_id": habit_id})
     except (FileNotFoundError, json.JSONDecodeError) as e:
         return jsonify({"error": str(e)}), 500
 
+_HISTORY_MIMETYPES = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson'
+}
+
+def _history_format(upload=None, default='jsonl'):
+    """Work out the history format from ?format=, the uploaded file or the request content type"""
+    fmt = request.args.get('format')
+    if not fmt and upload is not None:
+        filename = (upload.filename or '').lower()
+        is_csv = filename.endswith('.csv') or upload.mimetype == 'text/csv'
+        fmt = 'csv' if is_csv else default
+    if not fmt:
+        content_type = request.mimetype or ''
+        fmt = 'csv' if content_type == 'text/csv' else default
+    fmt = fmt.lower()
+    if fmt == 'ndjson':
+        fmt = 'jsonl'
+    return fmt if fmt in _HISTORY_MIMETYPES else None
+
+@app.route('/api/habits/import', methods=['POST'])
+def import_history():
+    # Accept either a multipart file upload or a raw request body,
+    # and decode it lazily so the upload is never held in memory as a whole
+    upload = request.files.get('file')
+    fmt = _history_format(upload)
+    if fmt is None:
+        return jsonify({"error": "Unsupported format, use csv or jsonl"}), 400
+    
+    raw_stream = upload.stream if upload else request.stream
+    text_stream = io.TextIOWrapper(raw_stream, encoding='utf-8-sig', newline='')
+    
+    try:
+        with open('data/habits.json', 'r') as f:
+            try:
+                data = json.load(f)
+            except json.JSONDecodeError:
+                data = {"habits": []}
+    except FileNotFoundError:
+        data = {"habits": []}
+    
+    importer = HistoryImporter(data)
+    try:
+        summary = importer.run(iter_records(text_stream, fmt))
+    except (ValueError, UnicodeDecodeError) as e:
+        return jsonify({"error": str(e)}), 400
+    
+    if summary['added'] or summary['created_habits']:
+        # A bulk import touches arbitrary dates, so rebuild in one pass
+        Rollups.build(data['habits']).save(version=save_habits(data))
+        
+    return jsonify(summary)
+
+@app.route('/api/habits/export', methods=['GET'])
+def export_history():
+    fmt = _history_format()
+    if fmt is None:
+        return jsonify({"error": "Unsupported format, use csv or jsonl"}), 400
+    
+    try:
+        with open('data/habits.json', 'r') as f:
+            data = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        data = {"habits": []}
+    
+    return Response(
+        export_records(data.get('habits', []), fmt),
+        mimetype=_HISTORY_MIMETYPES[fmt],
+        headers={"Content-Disposition": f"attachment; filename=habit_history.{fmt}"}
+    )
+
 @app.route('/api/habits/stats', methods=['GET'])
 def get_habit_stats():
     try:
@@ -194,20 +283,48 @@ def get_habit_stats():
         }
         
         for habit in data.get('habits', []):
-            habit_stats = {
+            stats["habits_data"].append({
                 "id": habit['id'],
                 "name": habit['name'],
-                "total_completions": len(habit['completions']),
-                "streak": calculate_streak(habit['completions']),
-                "completion_rate": calculate_completion_rate(habit['completions'], habit.get('created_at'))
-            }
-            stats["habits_data"].append(habit_stats)
+                **habit_stats(habit)
+            })
         
         return jsonify(stats)
     
     except (FileNotFoundError, json.JSONDecodeError) as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/analytics/timeseries', methods=['GET'])
+def get_timeseries():
+    granularity = request.args.get('granularity', 'day')
+    if granularity not in GRANULARITIES:
+        return jsonify({"error": "granularity must be one of: day, week, month"}), 400
+    
+    try:
+        end = datetime.strptime(request.args['end'], '%Y-%m-%d').date() if request.args.get('end') else datetime.now().date()
+        start = datetime.strptime(request.args['start'], '%Y-%m-%d').date() if request.args.get('start') else end - timedelta(days=29)
+    except ValueError:
+        return jsonify({"error": "start and end must be dates in YYYY-MM-DD format"}), 400
+    
+    if start > end:
+        return jsonify({"error": "start must not be after end"}), 400
+    
+    habit_id = request.args.get('habit_id')
+    rollups = Rollups.load()
+    
+    try:
+        series = rollups.series(start, end, granularity, habit_id)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    return jsonify({
+        "granularity": granularity,
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "habit_id": habit_id,
+        "series": series
+    })
+
 def calculate_streak(completions):
     """Calculate current streak for a habit"""
     if not completions:
@@ -279,28 +396,40 @@ def calculate_completion_rate(completions, created_at=None):
     # Return completion rate
     return round(len(set(c['date'] for c in completions)) / days_to_track * 100)
 
+def habit_stats(habit):
+    """Streak, completion rate and total completions for a single habit"""
+    # Skip malformed records and pass zero-padded dates on, so one bad or
+    # legacy completion can't break the listing
+    completions = []
+    for c in habit.get('completions', []):
+        date_str = normalize_date(c.get('date')) if isinstance(c, dict) else None
+        if date_str is not None:
+            completions.append({**c, 'date': date_str})
+    return {
+        "total_completions": len(completions),
+        "streak": calculate_streak(completions),
+        "completion_rate": calculate_completion_rate(completions, habit.get('created_at'))
+    }
+
 @app.route('/api/insights', methods=['GET'])
 def get_insights():
-    global _insights_cache, _insights_cache_time
-    
     try:
-        current_time = time.time()
-        
-        # Check if we have a valid cache
-        if _insights_cache and (current_time - _insights_cache_time) < _CACHE_DURATION:
-            return jsonify(_insights_cache)
-        
-        # Cache expired or doesn't exist, generate new insights
         from models.ai_service import AIService
         
-        with open('data/habits.json', 'r') as f:
-            data = json.load(f)
+        with open('data/habits.json', 'rb') as f:
+            raw = f.read()
         
-        # Create AI service instance
-        ai_service = AIService()
+        # The data version lets workers agree on which cached result is current
+        data_version = source_version(raw)
+        data = json.loads(raw or b'{}')
         
-        # Get insights with error handling
-        insights = ai_service.analyze_patterns(data.get('habits', []))
+        def generate():
+            # Create AI service instance
+            ai_service = AIService()
+            return ai_service.analyze_patterns(data.get('habits', []))
+        
+        # Only one worker calls the model per data version; the rest reuse its result
+        insights = _insights_cache.get_or_generate(data_version, generate)
         
         # Check if we got an error
         if "error" in insights:
@@ -309,10 +438,6 @@ def get_insights():
                 "error": insights.get("error", "Unknown error")
             }), 500
         
-        # Update cache
-        _insights_cache = insights
-        _insights_cache_time = current_time
-        
         return jsonify(insights)
     
     except Exception as e:
@@ -0,0 +1,84 @@
+import argparse
+import io
+import json
+import os
+import sys
+
+from models.history_io import BATCH_SIZE, HistoryImporter, iter_records, export_records
+from models.rollups import Rollups
+from models.storage import HABITS_FILE, save_habits, rollups_path
+
+
+def _guess_format(path, fmt):
+    if fmt:
+        return fmt
+    return 'csv' if path and path.lower().endswith('.csv') else 'jsonl'
+
+
+def _load_data(filename):
+    try:
+        with open(filename, 'r') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {"habits": []}
+
+
+def import_command(args):
+    fmt = _guess_format(args.file, args.format)
+    data = _load_data(args.data)
+    importer = HistoryImporter(data)
+
+    if args.file == '-':
+        stdin = io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8-sig', newline='')
+        summary = importer.run(iter_records(stdin, fmt), args.batch_size)
+    else:
+        with open(args.file, 'r', encoding='utf-8-sig', newline='') as f:
+            summary = importer.run(iter_records(f, fmt), args.batch_size)
+
+    if summary['added'] or summary['created_habits']:
+        os.makedirs(os.path.dirname(args.data) or '.', exist_ok=True)
+        Rollups.build(data['habits']).save(rollups_path(args.data), version=save_habits(data, args.data))
+
+    print(json.dumps(summary, indent=2))
+
+
+def export_command(args):
+    fmt = _guess_format(args.file, args.format)
+    habits = _load_data(args.data).get('habits', [])
+
+    if args.file == '-':
+        for chunk in export_records(habits, fmt):
+            sys.stdout.write(chunk)
+    else:
+        with open(args.file, 'w', encoding='utf-8', newline='') as f:
+            for chunk in export_records(habits, fmt):
+                f.write(chunk)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk import and export of habit completion history")
+    parser.add_argument('--data', default=HABITS_FILE, help="Path to habits.json")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    import_parser = subparsers.add_parser('import', help="Import completions from CSV or JSONL")
+    import_parser.add_argument('file', help="Input file, or - for stdin")
+    import_parser.add_argument('--format', choices=['csv', 'jsonl'])
+    import_parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    import_parser.set_defaults(func=import_command)
+
+    export_parser = subparsers.add_parser('export', help="Export completions to CSV or JSONL")
+    export_parser.add_argument('file', help="Output file, or - for stdout")
+    export_parser.add_argument('--format', choices=['csv', 'jsonl'])
+    export_parser.set_defaults(func=export_command)
+
+    args = parser.parse_args(argv)
+    try:
+        args.func(args)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,246 @@
+import csv
+import io
+import json
+from datetime import datetime
+
+# Number of parsed records applied to the habit index at a time
+BATCH_SIZE = 1000
+
+CSV_FIELDS = ["habit_id", "habit_name", "date", "timestamp"]
+
+
+def iter_csv_records(stream):
+    """
+    Yield completion records from a CSV text stream one row at a time.
+    Expects a header row with at least a date column and habit_id or habit_name.
+    """
+    reader = csv.DictReader(stream)
+    for row in reader:
+        yield {k.strip(): (v or '').strip() for k, v in row.items() if k}
+
+
+def iter_jsonl_records(stream):
+    """Yield completion records from a JSON Lines text stream, skipping blank lines"""
+    for line_number, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON on line {line_number}: {e}")
+        if not isinstance(record, dict):
+            raise ValueError(f"Line {line_number} is not a JSON object")
+        yield record
+
+
+def iter_records(stream, fmt):
+    """Pick the record parser for the given format ('csv' or 'jsonl')"""
+    if fmt == 'csv':
+        return iter_csv_records(stream)
+    if fmt == 'jsonl':
+        return iter_jsonl_records(stream)
+    raise ValueError(f"Unsupported format: {fmt}")
+
+
+def _text_field(record, key):
+    """Return a record field as a stripped string; only strings and numbers are accepted"""
+    value = record.get(key)
+    if value is None:
+        return ''
+    if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+        raise ValueError(f"{key} must be a string or number")
+    return str(value).strip()
+
+
+def normalize_date(value):
+    """Parse a YYYY-MM-DD date (padding optional) and return it zero-padded, or None"""
+    if not isinstance(value, str):
+        return None
+    try:
+        return datetime.strptime(value.strip(), '%Y-%m-%d').strftime('%Y-%m-%d')
+    except ValueError:
+        return None
+
+
+def _is_iso_timestamp(value):
+    if not isinstance(value, str):
+        return False
+    try:
+        datetime.fromisoformat(value.replace('Z', '+00:00'))
+        return True
+    except ValueError:
+        return False
+
+
+def iter_batches(records, size=BATCH_SIZE):
+    """Group an iterable of records into lists of at most `size` items"""
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class HistoryImporter:
+    """
+    Applies completion records to loaded habits data in batches.
+    Habits are indexed by id and name once, and existing completion dates are
+    kept in sets, so each record is applied in constant time.
+    """
+
+    def __init__(self, data):
+        self.data = data
+        self.data.setdefault('habits', [])
+        self._by_id = {}
+        self._by_name = {}
+        self._dates = {}
+        for habit in self.data['habits']:
+            self._index(habit)
+        self.added = 0
+        self.skipped = 0
+        self.created_habits = 0
+        self.errors = []
+
+    def _index(self, habit):
+        habit.setdefault('completions', [])
+        self._by_id[habit['id']] = habit
+        if habit.get('name'):
+            self._by_name.setdefault(habit['name'], habit)
+        self._dates[habit['id']] = {c.get('date') for c in habit['completions']}
+
+    def _new_habit_id(self):
+        # Same timestamp-based scheme as add_habit, suffixed to stay unique within a run
+        base = datetime.now().strftime('%Y%m%d%H%M%S')
+        habit_id = base
+        suffix = 1
+        while habit_id in self._by_id:
+            habit_id = f"{base}{suffix:03d}"
+            suffix += 1
+        return habit_id
+
+    def _resolve_habit(self, habit_id, habit_name, description=''):
+        if habit_id and habit_id in self._by_id:
+            return self._by_id[habit_id]
+        if habit_name and habit_name in self._by_name:
+            return self._by_name[habit_name]
+        if not habit_name:
+            return None
+
+        habit = {
+            "name": habit_name,
+            "description": description,
+            "id": habit_id or self._new_habit_id(),
+            "created_at": datetime.now().isoformat(),
+            "completions": []
+        }
+        self.data['habits'].append(habit)
+        self._index(habit)
+        self.created_habits += 1
+        return habit
+
+    def apply_batch(self, batch, line_offset=0):
+        """Apply a list of records; invalid records are counted and reported, not fatal"""
+        for i, record in enumerate(batch, start=1):
+            # Store and deduplicate on the zero-padded form, e.g. 2024-1-5 -> 2024-01-05
+            date_str = normalize_date(record.get('date'))
+            if date_str is None:
+                self._reject(line_offset + i, "Invalid or missing date (expected YYYY-MM-DD)")
+                continue
+
+            try:
+                habit_id = _text_field(record, 'habit_id')
+                habit_name = _text_field(record, 'habit_name')
+                description = _text_field(record, 'habit_description')
+            except ValueError as e:
+                self._reject(line_offset + i, str(e))
+                continue
+
+            timestamp = record.get('timestamp')
+            if timestamp and not _is_iso_timestamp(timestamp):
+                self._reject(line_offset + i, "Invalid timestamp (expected ISO 8601)")
+                continue
+
+            habit = self._resolve_habit(habit_id, habit_name, description)
+            if habit is None:
+                self._reject(line_offset + i, "Unknown habit_id and no habit_name given")
+                continue
+
+            dates = self._dates[habit['id']]
+            if date_str in dates:
+                self.skipped += 1
+                continue
+
+            dates.add(date_str)
+            habit['completions'].append({
+                "date": date_str,
+                "timestamp": timestamp or datetime.now().isoformat()
+            })
+            self.added += 1
+
+    def _reject(self, record_number, reason):
+        self.skipped += 1
+        # Keep the error list bounded for very large uploads
+        if len(self.errors) < 100:
+            self.errors.append({"record": record_number, "error": reason})
+
+    def run(self, records, batch_size=BATCH_SIZE):
+        """Consume a record iterator batch by batch and return a summary"""
+        offset = 0
+        for batch in iter_batches(records, batch_size):
+            self.apply_batch(batch, offset)
+            offset += len(batch)
+        return self.summary(offset)
+
+    def summary(self, processed):
+        return {
+            "processed": processed,
+            "added": self.added,
+            "skipped": self.skipped,
+            "created_habits": self.created_habits,
+            "errors": self.errors
+        }
+
+
+def iter_completion_rows(habits):
+    """Yield one flat completion record per habit completion"""
+    for habit in habits:
+        for completion in habit.get('completions', []):
+            yield {
+                "habit_id": habit.get('id'),
+                "habit_name": habit.get('name'),
+                "date": completion.get('date'),
+                "timestamp": completion.get('timestamp')
+            }
+
+
+def export_csv(habits):
+    """Generate CSV text chunks for all completions, header first"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CSV_FIELDS)
+    writer.writeheader()
+    for batch in iter_batches(iter_completion_rows(habits)):
+        writer.writerows(batch)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def export_jsonl(habits):
+    """Generate JSON Lines text chunks for all completions"""
+    for batch in iter_batches(iter_completion_rows(habits)):
+        yield ''.join(json.dumps(row) + '\n' for row in batch)
+
+
+def export_records(habits, fmt):
+    """Pick the export generator for the given format ('csv' or 'jsonl')"""
+    if fmt == 'csv':
+        return export_csv(habits)
+    if fmt == 'jsonl':
+        return export_jsonl(habits)
+    raise ValueError(f"Unsupported format: {fmt}")
@@ -0,0 +1,180 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+
+class InsightsCache:
+    """
+    SQLite-backed insights cache shared by every worker process.
+
+    Results are keyed by a data version (a hash of habits.json), so any write
+    invalidates them for all workers at once. Generation is single-flight: a
+    worker must hold the lease row before calling the model, and the others
+    serve the previous result or wait for the new one instead of stampeding.
+    The holder renews its lease while generating, so slow model calls don't
+    let a second worker take over.
+    """
+
+    def __init__(self, path='data/insights_cache.db', duration=300, lease_seconds=30,
+                 wait_timeout=60, poll_interval=0.5):
+        self.path = path
+        self.duration = duration
+        self.lease_seconds = lease_seconds
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        self._init_db()
+
+    def _connect(self):
+        # A connection per call keeps this safe across threads and processes
+        conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        return conn
+
+    def _init_db(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS insights (
+                    id INTEGER PRIMARY KEY CHECK (id = 1),
+                    version TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS lease (
+                    id INTEGER PRIMARY KEY CHECK (id = 1),
+                    owner TEXT NOT NULL,
+                    version TEXT NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+            """)
+        finally:
+            conn.close()
+
+    def _latest(self, conn):
+        row = conn.execute('SELECT version, payload, created_at FROM insights WHERE id = 1').fetchone()
+        if row is None:
+            return None
+        return {"version": row[0], "insights": json.loads(row[1]), "created_at": row[2]}
+
+    def _is_fresh(self, entry, version):
+        return (entry is not None and entry['version'] == version
+                and time.time() - entry['created_at'] < self.duration)
+
+    def _try_acquire(self, conn, owner, version):
+        """Take the lease if nobody holds it or the holder's lease has expired"""
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT expires_at FROM lease WHERE id = 1').fetchone()
+            if row is not None and row[0] > now:
+                conn.execute('ROLLBACK')
+                return False
+            conn.execute(
+                'INSERT OR REPLACE INTO lease (id, owner, version, expires_at) VALUES (1, ?, ?, ?)',
+                (owner, version, now + self.lease_seconds)
+            )
+            conn.execute('COMMIT')
+            return True
+        except sqlite3.Error:
+            conn.execute('ROLLBACK')
+            raise
+
+    def _renew(self, conn, owner):
+        """Push the lease expiry forward; False if the lease is no longer ours"""
+        cursor = conn.execute(
+            'UPDATE lease SET expires_at = ? WHERE id = 1 AND owner = ?',
+            (time.time() + self.lease_seconds, owner)
+        )
+        return cursor.rowcount == 1
+
+    def _heartbeat(self, owner, stop):
+        """Renew the lease until stop is set or the lease is lost"""
+        conn = self._connect()
+        try:
+            while not stop.wait(self.lease_seconds / 3):
+                try:
+                    if not self._renew(conn, owner):
+                        break
+                except sqlite3.Error:
+                    # e.g. "database is locked"; the lease is still ours, retry next tick
+                    continue
+        finally:
+            conn.close()
+
+    def _release(self, conn, owner):
+        conn.execute('DELETE FROM lease WHERE id = 1 AND owner = ?', (owner,))
+
+    def _store(self, conn, owner, version, insights):
+        """Store a result only while still holding the lease; returns whether it was stored"""
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT owner FROM lease WHERE id = 1').fetchone()
+            if row is None or row[0] != owner:
+                conn.execute('ROLLBACK')
+                return False
+            conn.execute(
+                'INSERT OR REPLACE INTO insights (id, version, payload, created_at) VALUES (1, ?, ?, ?)',
+                (version, json.dumps(insights), time.time())
+            )
+            conn.execute('COMMIT')
+            return True
+        except sqlite3.Error:
+            conn.execute('ROLLBACK')
+            raise
+
+    def get_or_generate(self, version, generate):
+        """
+        Return insights for the given data version, calling generate() at most
+        once across all workers. Results containing an "error" key are not cached.
+        """
+        owner = f"{os.getpid()}-{threading.get_ident()}-{uuid.uuid4().hex}"
+        conn = self._connect()
+        try:
+            deadline = time.time() + self.wait_timeout
+            while True:
+                entry = self._latest(conn)
+                if self._is_fresh(entry, version):
+                    return entry['insights']
+
+                if self._try_acquire(conn, owner, version):
+                    try:
+                        # Another worker may have finished while we were acquiring
+                        entry = self._latest(conn)
+                        if self._is_fresh(entry, version):
+                            return entry['insights']
+
+                        stop = threading.Event()
+                        heartbeat = threading.Thread(target=self._heartbeat, args=(owner, stop), daemon=True)
+                        heartbeat.start()
+                        try:
+                            insights = generate()
+                        finally:
+                            stop.set()
+                            heartbeat.join()
+
+                        if "error" not in insights:
+                            self._store(conn, owner, version, insights)
+                        return insights
+                    finally:
+                        self._release(conn, owner)
+
+                # Someone else is generating: serve the previous result if there is one
+                if entry is not None:
+                    return entry['insights']
+
+                if time.time() >= deadline:
+                    # The holder is taking too long, don't leave the request hanging
+                    return {
+                        "message": "Insights are still being generated, please try again shortly.",
+                        "analysis_ready": False
+                    }
+
+                time.sleep(self.poll_interval)
+        finally:
+            conn.close()
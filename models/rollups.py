@@ -0,0 +1,168 @@
+import json
+from datetime import date as date_type, datetime, timedelta
+
+from models.storage import source_version
+
+GRANULARITIES = ('day', 'week', 'month')
+
+# Upper bound on buckets per series, roughly ten years of days
+MAX_BUCKETS = 3660
+
+
+def period_key(date, granularity):
+    """
+    Bucket key for a date: the date itself for 'day', the Monday of its
+    ISO week for 'week', and YYYY-MM for 'month'
+    """
+    if granularity == 'day':
+        return date.strftime('%Y-%m-%d')
+    if granularity == 'week':
+        return (date - timedelta(days=date.weekday())).strftime('%Y-%m-%d')
+    if granularity == 'month':
+        return date.strftime('%Y-%m')
+    raise ValueError(f"Unsupported granularity: {granularity}")
+
+
+def bucket_count(start, end, granularity):
+    """Number of buckets iter_period_keys would yield for the range"""
+    if granularity == 'day':
+        return (end - start).days + 1
+    if granularity == 'week':
+        first = start - timedelta(days=start.weekday())
+        return (end - first).days // 7 + 1
+    if granularity == 'month':
+        return (end.year - start.year) * 12 + end.month - start.month + 1
+    raise ValueError(f"Unsupported granularity: {granularity}")
+
+
+def iter_period_keys(start, end, granularity):
+    """Yield every bucket key between start and end (inclusive), in order"""
+    if granularity in ('day', 'week'):
+        step = timedelta(days=1 if granularity == 'day' else 7)
+        current = start - timedelta(days=start.weekday()) if granularity == 'week' else start
+        while current <= end:
+            yield period_key(current, granularity)
+            # Stepping past date.max would raise OverflowError
+            if date_type.max - current < step:
+                break
+            current += step
+    elif granularity == 'month':
+        year, month = start.year, start.month
+        while (year, month) <= (end.year, end.month):
+            yield f"{year:04d}-{month:02d}"
+            month += 1
+            if month > 12:
+                year, month = year + 1, 1
+    else:
+        raise ValueError(f"Unsupported granularity: {granularity}")
+
+
+class Rollups:
+    """
+    Per-day, per-week and per-month completion counts, kept both across all
+    habits and per habit. Stored next to habits.json and tagged with the version
+    (content hash) of the habits.json they describe, so any write the rollups
+    did not see, from another worker or outside the app, triggers a rebuild.
+    """
+
+    def __init__(self, totals=None, habits=None, version=None):
+        self.totals = totals or {g: {} for g in GRANULARITIES}
+        self.habits = habits or {}
+        self.version = version
+
+    def _bump(self, counts, key, delta):
+        value = counts.get(key, 0) + delta
+        if value > 0:
+            counts[key] = value
+        else:
+            counts.pop(key, None)
+
+    def apply(self, habit_id, date_str, delta):
+        """Add (delta=1) or remove (delta=-1) one completion from every rollup"""
+        try:
+            date = datetime.strptime(date_str, '%Y-%m-%d').date()
+        except (ValueError, TypeError):
+            return
+
+        habit_counts = self.habits.setdefault(habit_id, {g: {} for g in GRANULARITIES})
+        for granularity in GRANULARITIES:
+            key = period_key(date, granularity)
+            self._bump(self.totals[granularity], key, delta)
+            self._bump(habit_counts[granularity], key, delta)
+
+    def remove_habit(self, habit_id):
+        """Subtract a deleted habit's counts from the totals"""
+        habit_counts = self.habits.pop(habit_id, None)
+        if not habit_counts:
+            return
+        for granularity in GRANULARITIES:
+            for key, count in habit_counts[granularity].items():
+                self._bump(self.totals[granularity], key, -count)
+
+    def series(self, start, end, granularity, habit_id=None):
+        """Return [{"period": key, "count": n}, ...] covering start..end with zero-filled gaps"""
+        if bucket_count(start, end, granularity) > MAX_BUCKETS:
+            raise ValueError(f"Range too large, at most {MAX_BUCKETS} {granularity} buckets per request")
+        if habit_id is None:
+            counts = self.totals[granularity]
+        else:
+            counts = self.habits.get(habit_id, {}).get(granularity, {})
+        return [
+            {"period": key, "count": counts.get(key, 0)}
+            for key in iter_period_keys(start, end, granularity)
+        ]
+
+    @classmethod
+    def build(cls, habits, version=None):
+        """Build rollups from scratch with a single pass over all completions"""
+        rollups = cls(version=version)
+        for habit in habits:
+            rollups.habits.setdefault(habit['id'], {g: {} for g in GRANULARITIES})
+            for date_str in {c.get('date') for c in habit.get('completions', [])}:
+                rollups.apply(habit['id'], date_str, 1)
+        return rollups
+
+    def to_dict(self):
+        return {
+            "version": self.version,
+            "totals": self.totals,
+            "habits": self.habits
+        }
+
+    @classmethod
+    def load(cls, version=None, habits=None, filename='data/rollups.json', source='data/habits.json'):
+        """
+        Load stored rollups for the given habits.json version, rebuilding them
+        from `habits` when the stored ones describe a different version.
+        Without a version, the current source file is read and used instead.
+        """
+        if version is None:
+            try:
+                with open(source, 'rb') as f:
+                    raw = f.read()
+            except FileNotFoundError:
+                raw = b''
+            version = source_version(raw)
+            try:
+                habits = json.loads(raw).get('habits', [])
+            except json.JSONDecodeError:
+                habits = []
+
+        try:
+            with open(filename, 'r') as f:
+                data = json.load(f)
+            if data.get('version') == version:
+                return cls(data.get('totals'), data.get('habits'), version)
+        except (FileNotFoundError, json.JSONDecodeError):
+            pass
+
+        rollups = cls.build(habits or [], version)
+        rollups.save(filename, version)
+        return rollups
+
+    def save(self, filename='data/rollups.json', version=None):
+        """Save rollups, stamped with the version of the habits.json they now describe"""
+        if version is not None:
+            self.version = version
+        with open(filename, 'w') as f:
+            json.dump(self.to_dict(), f)
@@ -0,0 +1,26 @@
+import hashlib
+import json
+import os
+
+HABITS_FILE = 'data/habits.json'
+
+
+def source_version(content):
+    """Version tag for habits.json contents (str or bytes)"""
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    return hashlib.sha1(content).hexdigest()
+
+
+def save_habits(data, filename=HABITS_FILE):
+    """Write habits data and return the version of the contents written"""
+    # Written as bytes so the version matches what a later read sees on any platform
+    content = json.dumps(data, indent=2).encode('utf-8')
+    with open(filename, 'wb') as f:
+        f.write(content)
+    return source_version(content)
+
+
+def rollups_path(filename=HABITS_FILE):
+    """Rollups live next to the habits file they describe"""
+    return os.path.join(os.path.dirname(filename), 'rollups.json')
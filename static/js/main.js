@@ -16,9 +16,13 @@ document.addEventListener('DOMContentLoaded', function() {
     const aiInsights = document.getElementById('ai-insights');
     
     // State
+    // habits keeps display order; habitState is keyed by id and holds each
+    // habit's completion date set and its DOM nodes so mutations patch in place
     let habits = [];
+    const habitState = new Map();
     let currentDate = new Date();
     let selectedHabitId = null;
+    let calendarObserver = null;
     
     // Format date as YYYY-MM-DD
     function formatDate(date) {
@@ -57,12 +61,25 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     }
     
+    // Register a habit in the keyed state
+    function trackHabit(habit) {
+        habit.stats = habit.stats || { streak: 0, completion_rate: 0, total_completions: 0 };
+        habitState.set(habit.id, {
+            habit: habit,
+            completionDates: new Set((habit.completions || []).map(c => c.date)),
+            listItem: null,
+            toggle: null
+        });
+    }
+    
     // Load habits from server
     async function loadHabits() {
         try {
             const response = await fetch('/api/habits');
             const data = await response.json();
             habits = data.habits || [];
+            habitState.clear();
+            habits.forEach(trackHabit);
             renderHabitList();
             renderHabitToggles();
             
@@ -192,6 +209,42 @@ document.addEventListener('DOMContentLoaded', function() {
         document.getElementById('refresh-insights-btn').addEventListener('click', loadAIInsights);
     }
     
+    // Build the sidebar entry for a habit
+    function createHabitListItem(habit) {
+        const habitElement = document.createElement('div');
+        habitElement.className = 'habit-item';
+        habitElement.dataset.habitId = habit.id;
+        if (selectedHabitId === habit.id) {
+            habitElement.classList.add('active');
+        }
+        
+        habitElement.innerHTML = `
+            <div class="habit-name">${habit.name}</div>
+            <div class="habit-meta">
+                <span class="habit-streak" title="Current streak">
+                    <i class="fas fa-fire"></i> <span class="stat-number">${habit.stats.streak}</span>
+                </span>
+                <span class="habit-completion-rate" title="Completion rate">
+                    <i class="fas fa-chart-line"></i> <span class="stat-number">${habit.stats.completion_rate}</span>%
+                </span>
+            </div>
+        `;
+        
+        return habitElement;
+    }
+    
+    // Patch an existing sidebar entry after its habit changed
+    function updateHabitListItem(habit) {
+        const entry = habitState.get(habit.id);
+        if (!entry || !entry.listItem) {
+            return;
+        }
+        
+        entry.listItem.querySelector('.habit-name').textContent = habit.name;
+        entry.listItem.querySelector('.habit-streak .stat-number').textContent = habit.stats.streak;
+        entry.listItem.querySelector('.habit-completion-rate .stat-number').textContent = habit.stats.completion_rate;
+    }
+    
     // Render the sidebar habit list
     function renderHabitList() {
         habitList.innerHTML = '';
@@ -201,36 +254,55 @@ document.addEventListener('DOMContentLoaded', function() {
             return;
         }
         
+        const fragment = document.createDocumentFragment();
         habits.forEach(habit => {
-            const streak = calculateStreak(habit.completions);
-            const completionRate = calculateCompletionRate(habit.completions, habit.created_at);
-            
-            const habitElement = document.createElement('div');
-            habitElement.className = 'habit-item';
-            if (selectedHabitId === habit.id) {
-                habitElement.classList.add('active');
-            }
-            
-            habitElement.innerHTML = `
-                <div class="habit-name">${habit.name}</div>
-                <div class="habit-meta">
-                    <span class="habit-streak" title="Current streak">
-                        <i class="fas fa-fire"></i> ${streak}
-                    </span>
-                    <span class="habit-completion-rate" title="Completion rate">
-                        <i class="fas fa-chart-line"></i> ${completionRate}%
-                    </span>
-                </div>
-            `;
-            
-            habitElement.addEventListener('click', () => {
-                selectedHabitId = habit.id;
-                renderHabitList(); // Re-render to update selection
-                renderHabitDetail(habit);
-            });
-            
-            habitList.appendChild(habitElement);
+            const listItem = createHabitListItem(habit);
+            habitState.get(habit.id).listItem = listItem;
+            fragment.appendChild(listItem);
         });
+        habitList.appendChild(fragment);
+    }
+    
+    // Build the toggle row for a habit
+    function createHabitToggle(habit) {
+        const entry = habitState.get(habit.id);
+        const isCompleted = entry.completionDates.has(formatDate(currentDate));
+        
+        const habitToggle = document.createElement('div');
+        habitToggle.className = 'habit-toggle';
+        habitToggle.dataset.habitId = habit.id;
+        habitToggle.innerHTML = `
+            <div class="toggle-container">
+                <input type="checkbox" class="toggle-checkbox" data-habit-id="${habit.id}" ${isCompleted ? 'checked' : ''}>
+            </div>
+            <div class="habit-info">
+                <h4>${habit.name}</h4>
+                <p${habit.description ? '' : ' hidden'}>${habit.description || ''}</p>
+            </div>
+            <div class="habit-actions">
+                <button class="btn-icon edit-habit" data-habit-id="${habit.id}">
+                    <i class="fas fa-edit"></i>
+                </button>
+                <button class="btn-icon delete-habit" data-habit-id="${habit.id}">
+                    <i class="fas fa-trash"></i>
+                </button>
+            </div>
+        `;
+        
+        return habitToggle;
+    }
+    
+    // Patch an existing toggle row after its habit was edited
+    function updateHabitToggle(habit) {
+        const entry = habitState.get(habit.id);
+        if (!entry || !entry.toggle) {
+            return;
+        }
+        
+        entry.toggle.querySelector('.habit-info h4').textContent = habit.name;
+        const description = entry.toggle.querySelector('.habit-info p');
+        description.textContent = habit.description || '';
+        description.hidden = !habit.description;
     }
     
     // Render the habit toggles for the current date
@@ -242,95 +314,107 @@ document.addEventListener('DOMContentLoaded', function() {
             return;
         }
         
-        const currentDateStr = formatDate(currentDate);
-        
+        const fragment = document.createDocumentFragment();
         habits.forEach(habit => {
-            const isCompleted = habit.completions.some(completion => 
-                completion.date === currentDateStr
-            );
-            
-            const habitToggle = document.createElement('div');
-            habitToggle.className = 'habit-toggle';
-            habitToggle.innerHTML = `
-                <div class="toggle-container">
-                    <input type="checkbox" class="toggle-checkbox" data-habit-id="${habit.id}" ${isCompleted ? 'checked' : ''}>
-                </div>
-                <div class="habit-info">
-                    <h4>${habit.name}</h4>
-                    ${habit.description ? `<p>${habit.description}</p>` : ''}
-                </div>
-                <div class="habit-actions">
-                    <button class="btn-icon edit-habit" data-habit-id="${habit.id}">
-                        <i class="fas fa-edit"></i>
-                    </button>
-                    <button class="btn-icon delete-habit" data-habit-id="${habit.id}">
-                        <i class="fas fa-trash"></i>
-                    </button>
-                </div>
-            `;
-            
-            habitToggles.appendChild(habitToggle);
-            
-            // Add event listeners
-            const checkbox = habitToggle.querySelector('.toggle-checkbox');
-            checkbox.addEventListener('change', function() {
-                toggleHabitCompletion(habit.id, currentDateStr, this.checked);
-            });
-            
-            const editBtn = habitToggle.querySelector('.edit-habit');
-            editBtn.addEventListener('click', () => {
-                showEditHabitForm(habit);
-            });
-            
-            const deleteBtn = habitToggle.querySelector('.delete-habit');
-            deleteBtn.addEventListener('click', () => {
-                if (confirm(`Are you sure you want to delete "${habit.name}"?`)) {
-                    deleteHabit(habit.id);
-                }
-            });
+            const habitToggle = createHabitToggle(habit);
+            habitState.get(habit.id).toggle = habitToggle;
+            fragment.appendChild(habitToggle);
+        });
+        habitToggles.appendChild(fragment);
+    }
+    
+    // Sync checkbox states with the current date without rebuilding the rows
+    function refreshToggleStates() {
+        const currentDateStr = formatDate(currentDate);
+        habitState.forEach(entry => {
+            if (entry.toggle) {
+                entry.toggle.querySelector('.toggle-checkbox').checked = entry.completionDates.has(currentDateStr);
+            }
         });
     }
     
+    // Insert a newly created habit into the list and toggles
+    function appendHabit(habit) {
+        if (habits.length === 1) {
+            // First habit replaces the empty-state placeholders
+            renderHabitList();
+            renderHabitToggles();
+            return;
+        }
+        
+        const entry = habitState.get(habit.id);
+        entry.listItem = createHabitListItem(habit);
+        entry.toggle = createHabitToggle(habit);
+        habitList.appendChild(entry.listItem);
+        habitToggles.appendChild(entry.toggle);
+    }
+    
+    // Remove a deleted habit's nodes from the list and toggles
+    function removeHabit(habitId) {
+        const entry = habitState.get(habitId);
+        habitState.delete(habitId);
+        
+        if (habits.length === 0) {
+            renderHabitList();
+            renderHabitToggles();
+            return;
+        }
+        
+        if (entry) {
+            if (entry.listItem) entry.listItem.remove();
+            if (entry.toggle) entry.toggle.remove();
+        }
+    }
+    
+    // Move the active highlight between sidebar entries
+    function selectHabit(habitId) {
+        const previous = habitState.get(selectedHabitId);
+        if (previous && previous.listItem) {
+            previous.listItem.classList.remove('active');
+        }
+        
+        selectedHabitId = habitId;
+        const entry = habitState.get(habitId);
+        if (entry) {
+            if (entry.listItem) entry.listItem.classList.add('active');
+            renderHabitDetail(entry.habit);
+        }
+    }
+    
     // Render habit detail
     function renderHabitDetail(habit) {
+        if (calendarObserver) {
+            calendarObserver.disconnect();
+            calendarObserver = null;
+        }
+        
         if (!habit) {
             habitDetail.style.display = 'none';
             return;
         }
         
-        const streak = calculateStreak(habit.completions);
-        const completionRate = calculateCompletionRate(habit.completions, habit.created_at);
-        
-        // Sort completions by date (newest first)
-        const sortedCompletions = [...habit.completions].sort((a, b) => {
-            return new Date(b.date) - new Date(a.date);
-        });
-        
-        // Generate calendar view (last 30 days)
-        const calendarHtml = generateCalendarView(habit);
-        
         habitDetail.innerHTML = `
             <h3>${habit.name}</h3>
             ${habit.description ? `<p class="habit-description">${habit.description}</p>` : ''}
             
             <div class="habit-stats">
                 <div class="stat-item">
-                    <div class="stat-value">${streak}</div>
+                    <div class="stat-value" data-stat="streak">${habit.stats.streak}</div>
                     <div class="stat-label">Current Streak</div>
                 </div>
                 <div class="stat-item">
-                    <div class="stat-value">${completionRate}%</div>
+                    <div class="stat-value" data-stat="completion_rate">${habit.stats.completion_rate}%</div>
                     <div class="stat-label">Completion Rate</div>
                 </div>
                 <div class="stat-item">
-                    <div class="stat-value">${sortedCompletions.length}</div>
+                    <div class="stat-value" data-stat="total_completions">${habit.stats.total_completions}</div>
                     <div class="stat-label">Total Completions</div>
                 </div>
             </div>
             
             <div class="habit-calendar">
                 <h4>Completion History</h4>
-                ${calendarHtml}
+                <div class="calendar-placeholder placeholder-text">Loading history...</div>
             </div>
             
             <div class="habit-actions">
@@ -357,6 +441,40 @@ document.addEventListener('DOMContentLoaded', function() {
         });
         
         habitDetail.style.display = 'block';
+        
+        // Only build the calendar once it actually scrolls into view
+        const placeholder = habitDetail.querySelector('.calendar-placeholder');
+        const renderCalendar = () => {
+            placeholder.outerHTML = generateCalendarView(habit);
+        };
+        
+        if ('IntersectionObserver' in window) {
+            calendarObserver = new IntersectionObserver(entries => {
+                if (entries.some(entry => entry.isIntersecting)) {
+                    calendarObserver.disconnect();
+                    calendarObserver = null;
+                    renderCalendar();
+                }
+            });
+            calendarObserver.observe(placeholder);
+        } else {
+            renderCalendar();
+        }
+    }
+    
+    // Patch the stats and calendar cell of the open habit detail
+    function updateHabitDetail(habit, date) {
+        habitDetail.querySelector('[data-stat="streak"]').textContent = habit.stats.streak;
+        habitDetail.querySelector('[data-stat="completion_rate"]').textContent = `${habit.stats.completion_rate}%`;
+        habitDetail.querySelector('[data-stat="total_completions"]').textContent = habit.stats.total_completions;
+        
+        // The calendar may not be rendered yet, or the date may fall outside it
+        const day = habitDetail.querySelector(`.calendar-day[data-date="${date}"]`);
+        if (day) {
+            const completed = habitState.get(habit.id).completionDates.has(date);
+            day.classList.toggle('completed', completed);
+            day.querySelector('.calendar-status').innerHTML = completed ? '<i class="fas fa-check"></i>' : '';
+        }
     }
     
     // Generate calendar view for habit completions
@@ -364,8 +482,8 @@ document.addEventListener('DOMContentLoaded', function() {
         const today = new Date();
         const days = [];
         
-        // Create a set of completion dates for quick lookup
-        const completionDates = new Set(habit.completions.map(c => c.date));
+        // Reuse the tracked set of completion dates for lookup
+        const completionDates = habitState.get(habit.id).completionDates;
         
         // Generate last 30 days
         for (let i = 0; i < 30; i++) {
@@ -385,7 +503,7 @@ document.addEventListener('DOMContentLoaded', function() {
         
         days.forEach(day => {
             calendarHtml += `
-                <div class="calendar-day ${day.completed ? 'completed' : ''}">
+                <div class="calendar-day ${day.completed ? 'completed' : ''}" data-date="${day.date}">
                     <div class="calendar-date">${day.display}</div>
                     <div class="calendar-status">
                         ${day.completed ? '<i class="fas fa-check"></i>' : ''}
@@ -417,11 +535,13 @@ document.addEventListener('DOMContentLoaded', function() {
             const result = await response.json();
             
             // Update local state
-            const habit = habits.find(h => h.id === habitId);
-            if (habit) {
+            const entry = habitState.get(habitId);
+            if (entry) {
+                const habit = entry.habit;
                 if (result.completed) {
                     // Add completion if not already completed
-                    if (!habit.completions.some(c => c.date === date)) {
+                    if (!entry.completionDates.has(date)) {
+                        entry.completionDates.add(date);
                         habit.completions.push({
                             date: date,
                             timestamp: new Date().toISOString()
@@ -429,112 +549,30 @@ document.addEventListener('DOMContentLoaded', function() {
                     }
                 } else {
                     // Remove completion if exists
+                    entry.completionDates.delete(date);
                     habit.completions = habit.completions.filter(c => c.date !== date);
                 }
+                habit.stats = result.stats || habit.stats;
                 
-                // Re-render affected elements
-                renderHabitList();
+                // Patch only the affected elements
+                updateHabitListItem(habit);
+                if (entry.toggle && date === formatDate(currentDate)) {
+                    entry.toggle.querySelector('.toggle-checkbox').checked = result.completed;
+                }
                 if (selectedHabitId === habitId) {
-                    renderHabitDetail(habit);
+                    updateHabitDetail(habit, date);
                 }
                 
                 // Show notification
                 showNotification(`Habit ${result.completed ? 'completed' : 'uncompleted'} for ${formatDateForDisplay(date)}`, 'success');
+                
+                // Refresh AI insights
+                loadAIInsights();
             }
         } catch (error) {
             console.error('Error toggling habit completion:', error);
             showNotification('Failed to update habit. Please try again.', 'error');
-        }
-    }
-    
-    // Calculate streak for a habit
-    function calculateStreak(completions) {
-        if (!completions || completions.length === 0) {
-            return 0;
-        }
-        
-        // Sort completions by date (newest first)
-        const sortedCompletions = [...completions].sort((a, b) => {
-            return new Date(b.date) - new Date(a.date);
-        });
-        
-        // Check if completed today or yesterday
-        const today = formatDate(new Date());
-        const yesterday = formatDate(new Date(Date.now() - 86400000));
-        
-        if (sortedCompletions[0].date !== today && sortedCompletions[0].date !== yesterday) {
-            return 0; // Streak broken if neither today nor yesterday
-        }
-        
-        // Count consecutive days
-        let streak = 1;
-        let lastDate = new Date(sortedCompletions[0].date);
-        
-        for (let i = 1; i < sortedCompletions.length; i++) {
-            const currentDate = new Date(sortedCompletions[i].date);
-            const expectedDate = new Date(lastDate);
-            expectedDate.setDate(expectedDate.getDate() - 1);
-            
-            if (currentDate.toDateString() === expectedDate.toDateString()) {
-                streak++;
-                lastDate = currentDate;
-            } else {
-                break;
-            }
-        }
-        
-        return streak;
-    }
-    
-    // Calculate completion rate correctly accounting for habit creation date and earliest completion
-    function calculateCompletionRate(completions, createdAt) {
-        if (!completions || completions.length === 0) {
-            return 0;
-        }
-        
-        // Get today's date and find all completion dates
-        const today = new Date();
-        today.setHours(0, 0, 0, 0); // Normalize to start of day
-        
-        const completion_dates = completions.map(c => new Date(c.date));
-        completion_dates.forEach(date => date.setHours(0, 0, 0, 0));
-        
-        // Find earliest date between: creation date and earliest completion date
-        let start_date = today;
-        
-        // Check creation date
-        if (createdAt) {
-            const creation_date = new Date(createdAt);
-            if (!isNaN(creation_date.getTime())) {
-                creation_date.setHours(0, 0, 0, 0);
-                if (creation_date < start_date) {
-                    start_date = creation_date;
-                }
-            }
-        }
-        
-        // Check earliest completion date
-        if (completion_dates.length > 0) {
-            const earliest_completion = new Date(Math.min(...completion_dates.map(d => d.getTime())));
-            if (earliest_completion < start_date) {
-                start_date = earliest_completion;
-            }
-        }
-        
-        // Calculate days to track (from earliest date to today)
-        const days_to_track = Math.floor((today - start_date) / (1000 * 60 * 60 * 24)) + 1;
-        
-        // Count unique dates with completions
-        const completed_dates = new Set();
-        completions.forEach(completion => {
-            completed_dates.add(completion.date);
-        });
-        
-        // Calculate and return the rate
-        if (days_to_track > 0) {
-            return Math.round((completed_dates.size / days_to_track) * 100);
-        } else {
-            return completed_dates.size > 0 ? 100 : 0; // Handle any date calculation issues
+            refreshToggleStates();
         }
     }
     
@@ -592,12 +630,11 @@ document.addEventListener('DOMContentLoaded', function() {
             // Reset selected habit if it was deleted
             if (selectedHabitId === habitId) {
                 selectedHabitId = null;
-                habitDetail.style.display = 'none';
+                renderHabitDetail(null);
             }
             
-            // Re-render affected elements
-            renderHabitList();
-            renderHabitToggles();
+            // Remove only the deleted habit's elements
+            removeHabit(habitId);
             
             // Show notification
             showNotification('Habit deleted successfully', 'success');
@@ -610,17 +647,49 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     }
     
+    // Delegated handlers so rows don't need their own listeners
+    habitList.addEventListener('click', function(e) {
+        const habitElement = e.target.closest('.habit-item');
+        if (habitElement) {
+            selectHabit(habitElement.dataset.habitId);
+        }
+    });
+    
+    habitToggles.addEventListener('change', function(e) {
+        if (e.target.classList.contains('toggle-checkbox')) {
+            toggleHabitCompletion(e.target.dataset.habitId, formatDate(currentDate), e.target.checked);
+        }
+    });
+    
+    habitToggles.addEventListener('click', function(e) {
+        const button = e.target.closest('.edit-habit, .delete-habit');
+        if (!button) {
+            return;
+        }
+        
+        const entry = habitState.get(button.dataset.habitId);
+        if (!entry) {
+            return;
+        }
+        
+        if (button.classList.contains('edit-habit')) {
+            showEditHabitForm(entry.habit);
+        } else if (confirm(`Are you sure you want to delete "${entry.habit.name}"?`)) {
+            deleteHabit(entry.habit.id);
+        }
+    });
+    
     // Handle date navigation
     prevDayBtn.addEventListener('click', function() {
         currentDate = new Date(currentDate.getTime() - 86400000); // Subtract one day
         updateCurrentDateDisplay();
-        renderHabitToggles();
+        refreshToggleStates();
     });
     
     nextDayBtn.addEventListener('click', function() {
         currentDate = new Date(currentDate.getTime() + 86400000); // Add one day
         updateCurrentDateDisplay();
-        renderHabitToggles();
+        refreshToggleStates();
     });
     
     // Show/hide habit form
@@ -677,14 +746,14 @@ document.addEventListener('DOMContentLoaded', function() {
             
             // Add to local state
             habits.push(savedHabit);
+            trackHabit(savedHabit);
             
             // Reset form and hide it
             newHabitForm.reset();
             habitForm.style.display = 'none';
             
-            // Re-render UI
-            renderHabitList();
-            renderHabitToggles();
+            // Add the new habit's elements
+            appendHabit(savedHabit);
             
             // Show notification
             showNotification('Habit created successfully', 'success');
@@ -730,14 +799,15 @@ document.addEventListener('DOMContentLoaded', function() {
             }
             
             // Update local state
-            const habit = habits.find(h => h.id === habitId);
-            if (habit) {
+            const entry = habitState.get(habitId);
+            if (entry) {
+                const habit = entry.habit;
                 habit.name = updatedHabit.name;
                 habit.description = updatedHabit.description;
                 
-                // Re-render affected elements
-                renderHabitList();
-                renderHabitToggles();
+                // Patch only the edited habit's elements
+                updateHabitListItem(habit);
+                updateHabitToggle(habit);
                 
                 if (selectedHabitId === habitId) {
                     renderHabitDetail(habit);
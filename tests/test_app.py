@@ -0,0 +1,95 @@
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip('flask')
+
+
+def _day(offset):
+    return (datetime.now() - timedelta(days=offset)).strftime('%Y-%m-%d')
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    # The app works on relative data/ paths, so run each test in its own directory
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "data").mkdir()
+    (tmp_path / "data" / "habits.json").write_text(json.dumps({"habits": []}))
+
+    from app import app
+    return app.test_client()
+
+
+def _write_habits(habits):
+    with open('data/habits.json', 'w') as f:
+        json.dump({"habits": habits}, f)
+
+
+def test_habit_stats_normalizes_and_skips_bad_completions(client):
+    from app import habit_stats
+
+    today = datetime.now()
+    unpadded = f"{today.year}-{today.month}-{today.day}"
+    habit = {
+        "id": "1",
+        "created_at": (today - timedelta(days=3)).isoformat(),
+        "completions": [
+            {"date": unpadded},
+            {"date": " " + _day(1)},
+            {"date": "abc"},
+            {"timestamp": "2024-01-01T00:00:00"},
+            "not-a-dict",
+        ]
+    }
+
+    assert habit_stats(habit) == {"total_completions": 2, "streak": 2, "completion_rate": 50}
+
+
+def test_listing_includes_stats_despite_bad_records(client):
+    _write_habits([{
+        "id": "1",
+        "name": "Read",
+        "created_at": datetime.now().isoformat(),
+        "completions": [{"date": " " + _day(0)}, {"date": "abc"}, {}]
+    }])
+
+    response = client.get('/api/habits')
+    assert response.status_code == 200
+    assert response.get_json()['habits'][0]['stats']['streak'] == 1
+
+    assert client.get('/api/habits/stats').status_code == 200
+
+
+def test_create_and_toggle_return_stats(client):
+    habit = client.post('/api/habits', json={"name": "Read", "description": ""}).get_json()
+    assert habit['stats'] == {"total_completions": 0, "streak": 0, "completion_rate": 0}
+
+    result = client.post(f"/api/habits/{habit['id']}/toggle", json={"date": _day(0)}).get_json()
+    assert result['completed'] is True
+    assert result['stats']['streak'] == 1
+    assert result['stats']['total_completions'] == 1
+
+
+def test_toggle_rejects_bad_dates_without_writing(client):
+    habit = client.post('/api/habits', json={"name": "Read", "description": ""}).get_json()
+
+    response = client.post(f"/api/habits/{habit['id']}/toggle", json={"date": "abc"})
+    assert response.status_code == 400
+
+    with open('data/habits.json') as f:
+        assert json.load(f)['habits'][0]['completions'] == []
+
+
+def test_import_multipart_csv_with_bom(client):
+    import io
+
+    _write_habits([{"id": "1", "name": "Read", "created_at": "2024-01-01T00:00:00", "completions": []}])
+    upload = io.BytesIO(b"\xef\xbb\xbfhabit_id,habit_name,date\n1,,2024-02-03\n")
+
+    response = client.post('/api/habits/import', data={"file": (upload, "history.csv")},
+                           content_type='multipart/form-data')
+    assert response.get_json()['added'] == 1
+
+    exported = client.get('/api/habits/export?format=csv').get_data(as_text=True)
+    assert "1,Read,2024-02-03" in exported
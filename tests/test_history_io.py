@@ -0,0 +1,77 @@
+import io
+import json
+
+from models.history_io import HistoryImporter, iter_records, export_records
+
+
+def _data():
+    return {"habits": [{
+        "id": "1",
+        "name": "Read",
+        "description": "",
+        "created_at": "2024-01-01T08:00:00",
+        "completions": [{"date": "2024-01-05", "timestamp": "2024-01-05T08:00:00"}]
+    }]}
+
+
+def _import(data, text, fmt):
+    return HistoryImporter(data).run(iter_records(io.StringIO(text), fmt))
+
+
+def test_unpadded_dates_are_normalized_and_deduplicated():
+    data = _data()
+    summary = _import(data, "habit_id,habit_name,date\n1,,2024-1-5\n1,,2024-1-6\n", 'csv')
+
+    assert summary['added'] == 1
+    assert summary['skipped'] == 1
+    dates = [c['date'] for c in data['habits'][0]['completions']]
+    assert dates == ["2024-01-05", "2024-01-06"]
+
+
+def test_unknown_names_create_habits():
+    data = _data()
+    summary = _import(data, '{"habit_name": "Run", "date": "2024-02-01"}\n', 'jsonl')
+
+    assert summary['created_habits'] == 1
+    assert data['habits'][1]['name'] == "Run"
+    assert data['habits'][1]['completions'][0]['date'] == "2024-02-01"
+
+
+def test_invalid_records_are_rejected():
+    data = _data()
+    lines = [
+        {"habit_id": "1", "date": "not-a-date"},
+        {"habit_id": {"a": 1}, "date": "2024-02-01"},
+        {"habit_name": ["x"], "date": "2024-02-01"},
+        {"habit_id": "1", "date": "2024-02-01", "timestamp": "yesterday"},
+        {"habit_id": "missing", "date": "2024-02-01"},
+    ]
+    text = ''.join(json.dumps(line) + '\n' for line in lines)
+    summary = _import(data, text, 'jsonl')
+
+    assert summary['added'] == 0
+    assert summary['created_habits'] == 0
+    assert [e['record'] for e in summary['errors']] == [1, 2, 3, 4, 5]
+    assert len(data['habits']) == 1
+
+
+def test_export_round_trip():
+    data = _data()
+    csv_text = ''.join(export_records(data['habits'], 'csv'))
+    assert csv_text.splitlines()[0] == "habit_id,habit_name,date,timestamp"
+
+    target = {"habits": []}
+    summary = _import(target, csv_text, 'csv')
+    assert summary['added'] == 1
+    assert target['habits'][0]['completions'][0]['date'] == "2024-01-05"
+
+
+def test_utf8_bom_is_stripped_from_csv_header():
+    # Excel and most trackers prefix CSV exports with a BOM
+    raw = io.BytesIO("\ufeffhabit_id,habit_name,date\n1,,2024-02-03\n".encode('utf-8'))
+    stream = io.TextIOWrapper(raw, encoding='utf-8-sig', newline='')
+    data = _data()
+    summary = HistoryImporter(data).run(iter_records(stream, 'csv'))
+
+    assert summary['added'] == 1
+    assert data['habits'][0]['completions'][-1]['date'] == "2024-02-03"
@@ -0,0 +1,98 @@
+import sqlite3
+import threading
+import time
+
+from models.insights_cache import InsightsCache
+
+
+def _cache(tmp_path, **kwargs):
+    return InsightsCache(str(tmp_path / "insights.db"), poll_interval=0.02, **kwargs)
+
+
+def _run_concurrently(target, count):
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(target())) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_concurrent_misses_generate_once(tmp_path):
+    cache = _cache(tmp_path)
+    calls = []
+
+    def generate():
+        calls.append(1)
+        time.sleep(0.3)
+        return {"message": "ok"}
+
+    results = _run_concurrently(lambda: cache.get_or_generate("v1", generate), 6)
+
+    assert len(calls) == 1
+    assert results == [{"message": "ok"}] * 6
+
+
+def test_lease_is_renewed_during_slow_generation(tmp_path):
+    # Generation outlasts the lease several times over; nobody may take it over
+    cache = _cache(tmp_path, lease_seconds=0.15)
+    calls = []
+
+    def generate():
+        calls.append(1)
+        time.sleep(0.6)
+        return {"message": "ok"}
+
+    _run_concurrently(lambda: cache.get_or_generate("v1", generate), 4)
+
+    assert len(calls) == 1
+
+
+def test_new_version_regenerates_and_errors_are_not_cached(tmp_path):
+    cache = _cache(tmp_path)
+
+    assert cache.get_or_generate("v1", lambda: {"message": "one"}) == {"message": "one"}
+    assert cache.get_or_generate("v1", lambda: {"message": "other"}) == {"message": "one"}
+    assert cache.get_or_generate("v2", lambda: {"error": "down"}) == {"error": "down"}
+    assert cache.get_or_generate("v2", lambda: {"message": "two"}) == {"message": "two"}
+
+
+def test_store_requires_holding_the_lease(tmp_path):
+    cache = _cache(tmp_path, lease_seconds=0)
+    conn = cache._connect()
+    try:
+        assert cache._try_acquire(conn, "a", "v1")
+        # The lease expired immediately, so another worker takes it over
+        assert cache._try_acquire(conn, "b", "v2")
+
+        assert not cache._store(conn, "a", "v1", {"message": "stale"})
+        assert cache._store(conn, "b", "v2", {"message": "fresh"})
+        assert cache._latest(conn)["version"] == "v2"
+    finally:
+        conn.close()
+
+
+def test_heartbeat_survives_database_errors(tmp_path, monkeypatch):
+    cache = _cache(tmp_path, lease_seconds=0.15)
+    renewals = []
+    original_renew = InsightsCache._renew
+
+    def flaky_renew(self, conn, owner):
+        renewals.append(1)
+        if len(renewals) == 1:
+            raise sqlite3.OperationalError("database is locked")
+        return original_renew(self, conn, owner)
+
+    monkeypatch.setattr(InsightsCache, '_renew', flaky_renew)
+    calls = []
+
+    def generate():
+        calls.append(1)
+        time.sleep(0.6)
+        return {"message": "ok"}
+
+    _run_concurrently(lambda: cache.get_or_generate("v1", generate), 3)
+
+    assert len(renewals) > 1
+    assert len(calls) == 1
@@ -0,0 +1,73 @@
+import json
+from datetime import date
+
+import pytest
+
+from models.rollups import Rollups, MAX_BUCKETS
+from models.storage import source_version
+
+
+HABITS = [
+    {"id": "1", "completions": [{"date": "2024-01-01"}, {"date": "2024-01-02"}]},
+    {"id": "2", "completions": [{"date": "2024-01-02"}, {"date": "2024-02-10"}]},
+]
+
+
+def test_build_counts_every_granularity():
+    rollups = Rollups.build(HABITS)
+
+    assert rollups.totals['day'] == {"2024-01-01": 1, "2024-01-02": 2, "2024-02-10": 1}
+    assert rollups.totals['week'] == {"2024-01-01": 3, "2024-02-05": 1}
+    assert rollups.totals['month'] == {"2024-01": 3, "2024-02": 1}
+
+
+def test_apply_and_remove_habit():
+    rollups = Rollups.build(HABITS)
+    rollups.apply("1", "2024-01-01", -1)
+    rollups.apply("1", "2024-1-3", 1)
+    rollups.remove_habit("2")
+
+    assert rollups.totals['day'] == {"2024-01-02": 1, "2024-01-03": 1}
+    assert rollups.totals['month'] == {"2024-01": 2}
+    assert "2" not in rollups.habits
+
+
+def test_series_zero_fills_and_filters_by_habit():
+    rollups = Rollups.build(HABITS)
+
+    series = rollups.series(date(2024, 1, 1), date(2024, 1, 3), 'day', habit_id="2")
+    assert series == [
+        {"period": "2024-01-01", "count": 0},
+        {"period": "2024-01-02", "count": 1},
+        {"period": "2024-01-03", "count": 0},
+    ]
+
+
+def test_series_rejects_oversized_ranges():
+    rollups = Rollups.build(HABITS)
+
+    with pytest.raises(ValueError):
+        rollups.series(date(1, 1, 1), date(9999, 12, 30), 'day')
+    # Ends at date.max without overflowing
+    series = rollups.series(date(9999, 12, 1), date.max, 'day')
+    assert series[-1]["period"] == "9999-12-31"
+    assert len(rollups.series(date(9999, 1, 1), date.max, 'week')) <= MAX_BUCKETS
+
+
+def test_load_rebuilds_when_version_differs(tmp_path):
+    source = tmp_path / "habits.json"
+    content = json.dumps({"habits": HABITS}).encode('utf-8')
+    source.write_bytes(content)
+    filename = str(tmp_path / "rollups.json")
+
+    # Stale rollups stamped with another version are ignored
+    Rollups(version="stale").save(filename)
+    rollups = Rollups.load(filename=filename, source=str(source))
+    assert rollups.version == source_version(content)
+    assert rollups.totals['day']["2024-01-02"] == 2
+
+    # Matching stored rollups are used as-is
+    stored = Rollups(version="v1")
+    stored.apply("1", "2024-03-01", 1)
+    stored.save(filename)
+    assert Rollups.load("v1", [], filename=filename).totals['day'] == {"2024-03-01": 1}